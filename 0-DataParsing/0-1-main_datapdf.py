@@ -5,36 +5,226 @@ This module provides utilities for loading, parsing, and processing PDF document
 using various LangChain loaders with enhanced text cleaning and chunking capabilities.
 """
 
+import hashlib
+import mmap
+import os
+import pickle
+import shutil
+import subprocess
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from pathlib import Path
 
-from langchain_community.document_loaders import (PyPDFLoader,PyMuPDFLoader,UnstructuredPDFLoader)
+import fitz  # PyMuPDF
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
 
-# PypdfLoader
-print("PyPdfloader")
+PDF_CACHE_DIR = Path.home() / ".cache" / "datapdf"
 
-try:
-    pdf_loader = PyPDFLoader("data/pdf/th.pdf")
-    pdf_docs = pdf_loader.load()
-    
-    print(f"📄 Loaded {len(pdf_docs)} pages")
-    print(f"📄 Page 1 content : {pdf_docs[0].page_content[:100]}...")
-    print(f"📄 Metadata : {pdf_docs[0].metadata}")
+# PDFs larger than this are memory-mapped, so the kernel pages in only what MuPDF reads
+MMAP_THRESHOLD = 10 * 1024 * 1024
+# PDFs larger than this are streamed page by page instead of being loaded whole
+STREAM_THRESHOLD = 100 * 1024 * 1024
 
-    print(pdf_docs)
-except Exception as e:
-    print(f"❌ Error loading PDF: {e}")
 
+@contextmanager
+def _open_pdf(path):
+    """Open a PDF with PyMuPDF, passing large files as a memoryview over an mmap"""
+    if os.path.getsize(path) <= MMAP_THRESHOLD:
+        with fitz.open(path) as doc:
+            yield doc
+        return
 
-# Method 2 : PyMuPDFLoader (Fast and accurate)
-print("\n PyMuPDFLoader")
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            with fitz.open(stream=view, filetype="pdf") as doc:
+                yield doc
+        finally:
+            # The document keeps the view, so it is closed before the view is released
+            view.release()
 
-try:
-    pymupdf_loader = PyMuPDFLoader("data/pdf/th.pdf")
-    pymupdf_docs = pymupdf_loader.load()
 
-    print(f"📄 Loaded {len(pymupdf_docs)} pages")
-    print(f"📄 Page 1 content : {pymupdf_docs[0].page_content[:200]}...")
-    print(f"📄 Metadata : {pymupdf_docs[0].metadata}")
+def _page_text(doc, i):
+    """Extract the text of page i, or None if the page cannot be read"""
+    try:
+        return doc[i].get_text()
+    except Exception as e:
+        # One corrupt page should not kill the whole document
+        print(f"⚠️  Skipping page {i}: {e}")
+        return None
 
-    print(pymupdf_docs)
-except Exception as e:
-    print(f"❌ Error loading PDF: {e}")
+
+def _extract_pages(path, page_indices):
+    """Extract text for a range of pages using a document handle owned by this process"""
+    pages = []
+    with _open_pdf(path) as doc:
+        for i in page_indices:
+            text = _page_text(doc, i)
+            if text is not None:
+                pages.append((i, text))
+    return pages
+
+
+def load_pdf_parallel(path, max_workers=None):
+    """Load a PDF into one Document per page, extracting page ranges in worker processes"""
+    with _open_pdf(path) as doc:
+        page_count = doc.page_count
+
+    # PyMuPDF is not thread safe, so each process opens its own document
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, page_count))
+    if max_workers == 1:
+        pages = _extract_pages(path, range(page_count))
+    else:
+        step = -(-page_count // max_workers)
+        page_ranges = [range(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_extract_pages, repeat(path), page_ranges)
+            pages = [page for batch in results for page in batch]
+
+    return [
+        Document(page_content=text, metadata={"page": i, "source": path})
+        for i, text in pages
+    ]
+
+
+def pdf_summary(path):
+    """Read page count and document metadata without extracting any page text"""
+    with _open_pdf(path) as doc:
+        return {"page_count": doc.page_count, **doc.metadata}
+
+
+def _pdftotext_load(path):
+    """Load a PDF with the poppler pdftotext CLI, one Document per form-feed separated page"""
+    result = subprocess.run(["pdftotext", "-layout", path, "-"], capture_output=True, check=True)
+    pages = result.stdout.decode("utf-8", errors="replace").split("\x0c")
+    # pdftotext terminates every page with a form feed, leaving an empty tail
+    if pages and not pages[-1].strip():
+        pages.pop()
+    return [
+        Document(page_content=text, metadata={"page": i, "source": path})
+        for i, text in enumerate(pages)
+    ]
+
+
+def _pdf_extractor():
+    """Name of the extractor load_pdf prefers: pdftotext when it is installed, else PyMuPDF"""
+    return "pdftotext" if shutil.which("pdftotext") else "pymupdf"
+
+
+def load_pdf(path):
+    """Load a PDF with pdftotext when it is installed, otherwise with PyMuPDF"""
+    if _pdf_extractor() == "pdftotext":
+        try:
+            return _pdftotext_load(path)
+        except subprocess.CalledProcessError as e:
+            print(f"⚠️  pdftotext failed, falling back to PyMuPDF: {e}")
+    return load_pdf_parallel(path)
+
+
+def _pdf_cache(path, force_refresh=False):
+    """Load a PDF through an on-disk cache keyed by the MD5 of its bytes and the extractor"""
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            md5.update(block)
+    # pdftotext -layout and PyMuPDF lay text out differently, so each gets its own entry
+    cache_file = PDF_CACHE_DIR / f"{md5.hexdigest()}-{_pdf_extractor()}.pkl"
+
+    if cache_file.exists() and not force_refresh:
+        try:
+            with open(cache_file, "rb") as f:
+                pages = pickle.load(f)
+            return [
+                Document(page_content=zlib.decompress(text).decode("utf-8"), metadata=metadata)
+                for text, metadata in pages
+            ]
+        except (EOFError, pickle.UnpicklingError, zlib.error, TypeError, ValueError) as e:
+            # A truncated, corrupt or wrongly shaped entry is a miss; it is rebuilt below
+            print(f"⚠️  Ignoring unreadable cache file {cache_file}: {e}")
+
+    docs = load_pdf(path)
+
+    # Page text compresses well, so store it zlib-compressed
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    pages = [(zlib.compress(doc.page_content.encode("utf-8")), doc.metadata) for doc in docs]
+    # Write to a temp file and rename, so readers never see a half-written entry
+    with tempfile.NamedTemporaryFile(dir=PDF_CACHE_DIR, suffix=".tmp", delete=False) as f:
+        try:
+            pickle.dump(pages, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, cache_file)
+
+    return docs
+
+
+def lazy_load_pdf(path):
+    """Yield one Document per page, so only the current page's text is held in memory"""
+    with _open_pdf(path) as doc:
+        for i in range(doc.page_count):
+            text = _page_text(doc, i)
+            if text is not None:
+                yield Document(page_content=text, metadata={"page": i, "source": path})
+
+
+def iter_pdf_chunks(page_docs, splitter):
+    """Chunk page Documents one at a time; pass lazy_load_pdf(path) to stream a large PDF"""
+    for page_doc in page_docs:
+        yield from splitter.split_documents([page_doc])
+
+
+def main():
+    """Run the PDF loading demo"""
+    # Metadata only: reads the xref and info dictionary, no page text is extracted
+    print("PDF summary")
+
+    try:
+        summary = pdf_summary("data/pdf/th.pdf")
+        print(f"📄 {summary['page_count']} pages, title: {summary.get('title') or 'n/a'}")
+    except Exception as e:
+        print(f"❌ Error reading PDF metadata: {e}")
+
+
+    # Small PDFs are loaded whole through the cache (pdftotext when available, else PyMuPDF
+    # with pages extracted in parallel); large ones are streamed so only one page is held
+    print("\n PDF loading")
+
+    page_docs = None
+    try:
+        if os.path.getsize("data/pdf/th.pdf") > STREAM_THRESHOLD:
+            page_docs = lazy_load_pdf("data/pdf/th.pdf")
+            print("📄 Large PDF, streaming pages")
+        else:
+            pymupdf_docs = _pdf_cache("data/pdf/th.pdf")
+
+            print(f"📄 Loaded {len(pymupdf_docs)} pages")
+            print(f"📄 Page 1 content : {pymupdf_docs[0].page_content[:200]}...")
+            print(f"📄 Metadata : {pymupdf_docs[0].metadata}")
+            print(f"📄 {len(pymupdf_docs)} pages, {sum(len(d.page_content) for d in pymupdf_docs)} chars total")
+            page_docs = pymupdf_docs
+    except Exception as e:
+        print(f"❌ Error loading PDF: {e}")
+
+
+    # Chunk whichever pages the loading step produced, so the PDF is parsed only once
+    if page_docs is not None:
+        print("\n Chunking pages")
+
+        try:
+            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+            pdf_chunks = list(iter_pdf_chunks(page_docs, splitter))
+
+            print(f"📄 Created {len(pdf_chunks)} chunks")
+            print(f"📄 Metadata : {pdf_chunks[0].metadata}")
+        except Exception as e:
+            print(f"❌ Error chunking PDF: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,125 @@ This module provides utilities for loading, parsing, and processing PDF document
 using various LangChain loaders with enhanced text cleaning and chunking capabilities.
 """
 
-from typing import List, Dict, Any
-from langchain_community.document_loaders import PyPDFLoader, PyMuPDFLoader
+import hashlib
+import json
+import mmap
+import os
+import re
+import time
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import fitz  # PyMuPDF
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the standard json module
+    orjson = None
+
+try:
+    # Third-party regex engine for the cleaning patterns; installed alongside tiktoken
+    import regex as _regex
+except ImportError:
+    _regex = re
+
+_SEP = "=" * 70
+_DASH = "-" * 70
+
+# Pages with less text than this after cleaning are treated as nearly empty
+MIN_PAGE_CHARS = 50
+
+# Files larger than this are memory-mapped; below it the mmap setup costs more than it saves
+MMAP_THRESHOLD = 50 * 1024 * 1024
+
+# Common mis-decoded PDF ligatures; the longer sequence must be tried first
+_LIGATURES = {"ï¬‚": "fl", "ï¬": "fi"}
+# regex's \s leaves out the U+001C-U+001F separators that str.split() and re treat as whitespace
+_WHITESPACE_RE = _regex.compile(r"[\s\x1c-\x1f]+")
+_LIGATURE_RE = _regex.compile("|".join(map(re.escape, _LIGATURES)))
+
+
+def _replace_ligature(match: Any) -> str:
+    return _LIGATURES[match.group(0)]
+
+
+@lru_cache(maxsize=16)
+def _get_splitter(chunk_size: int, chunk_overlap: int) -> RecursiveCharacterTextSplitter:
+    """Return a shared splitter for the given configuration, built once per process."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""]
+    )
+
+
+@contextmanager
+def _open_pdf(pdf_path: str) -> Iterator["fitz.Document"]:
+    """
+    Open a PDF with PyMuPDF, memory-mapping it when it exceeds MMAP_THRESHOLD.
+
+    PyMuPDF takes a memoryview as its stream without copying, so the OS page
+    cache serves the xref and page reads. The document holds on to the view,
+    so it is closed first, then the view is released and the file unmapped.
+    """
+    if os.path.getsize(pdf_path) <= MMAP_THRESHOLD:
+        with fitz.open(pdf_path) as doc:
+            yield doc
+        return
+
+    with open(pdf_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            with fitz.open(stream=view, filetype="pdf") as doc:
+                yield doc
+        finally:
+            view.release()
+
+
+def _process_page_worker(payload: Tuple[str, int, int]) -> Tuple[int, List[str], bytes]:
+    """
+    Clean and chunk the text of a single page.
+
+    Defined at module scope so it can be pickled into ProcessPoolExecutor workers.
+
+    Args:
+        payload: (page_content, chunk_size, chunk_overlap)
+
+    Returns:
+        (char_count, chunk_texts, digest) where char_count is the cleaned text
+        length, chunk_texts is empty for nearly empty pages and digest hashes
+        the cleaned text so repeated pages can be recognised
+    """
+    page_content, chunk_size, chunk_overlap = payload
+
+    cleaned_text = clean_text(page_content)
+    digest = hashlib.blake2b(cleaned_text.encode("utf-8"), digest_size=8).digest()
+
+    # Skip nearly empty pages
+    if len(cleaned_text.strip()) < MIN_PAGE_CHARS:
+        return len(cleaned_text), [], digest
+
+    return len(cleaned_text), _get_splitter(chunk_size, chunk_overlap).split_text(cleaned_text), digest
+
+
+def _process_pages_worker(batch: List[Tuple[str, int, int]]) -> List[Tuple[int, List[str], bytes]]:
+    """
+    Clean and chunk a batch of pages in one task.
+
+    Args:
+        batch: List of _process_page_worker payloads
+
+    Returns:
+        One (char_count, chunk_texts, digest) result per page, in order
+    """
+    return [_process_page_worker(payload) for payload in batch]
+
+
 class SmartPDFProcessor:
     """
     Advanced PDF processing with error handling and smart chunking.
@@ -21,62 +135,191 @@ class SmartPDFProcessor:
     - Error handling for malformed PDFs
     """
     
-    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 100):
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 100,
+                 image_only_threshold: int = 20):
         """
         Initialize the PDF processor.
         
         Args:
             chunk_size: Maximum size of each text chunk
             chunk_overlap: Number of characters to overlap between chunks
+            image_only_threshold: A PDF whose first page has fewer characters
+                than this and contains images is treated as scanned and skipped
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        self.image_only_threshold = image_only_threshold
+        # (char_count, chunk_texts, digest) keyed by a hash of the page text and chunk settings
+        self._chunk_cache: Dict[str, Tuple[int, List[str], bytes]] = {}
+        # Shared with other processors (and worker processes) using the same settings
+        self.text_splitter = _get_splitter(chunk_size, chunk_overlap)
     
-    def process_pdf(self, pdf_path: str) -> List[Document]:
+    def process_pdf(self, pdf_path: str, max_workers: Optional[int] = None) -> List[Document]:
         """
         Process PDF with smart chunking and metadata enhancement.
         
+        Pages are cleaned and chunked in parallel across processes. Chunks are
+        cached per processor by page content, so unchanged pages are not
+        re-chunked when a PDF is processed again.
+        
         Args:
             pdf_path: Path to the PDF file
+            max_workers: Number of worker processes (defaults to the CPU count;
+                1 processes pages inline)
             
         Returns:
-            List of processed Document chunks with enhanced metadata
+            List of processed Document chunks with enhanced metadata, or a single
+            empty placeholder Document if the PDF looks image-only (see _skip_image_only)
         """
-        # Load PDF
-        loader = PyPDFLoader(pdf_path)
-        pages = loader.load()
+        # Load PDF (one Document per page) through a single document handle
+        with _open_pdf(pdf_path) as doc:
+            skipped = self._skip_image_only(doc, pdf_path)
+            if skipped:
+                return skipped
+            
+            base_metadata = self._document_metadata(doc, pdf_path)
+            pages = [
+                Document(page_content=page.get_text("text"), metadata={**base_metadata, "page": page_num})
+                for page_num, page in enumerate(doc)
+            ]
+        
+        # Cleaning never grows text, so pages this short can be dropped before
+        # paying for hashing, cleaning or a trip to a worker process
+        kept = [page for page in pages if len(page.page_content) >= MIN_PAGE_CHARS]
+        
+        keys = [self._cache_key(page.page_content) for page in kept]
+        misses = {key: page.page_content for key, page in zip(keys, kept) if key not in self._chunk_cache}
+        payloads = [(text, self.chunk_size, self.chunk_overlap) for text in misses.values()]
+        
+        # Single pages are not worth the cost of starting worker processes
+        if len(payloads) <= 1 or max_workers == 1:
+            results = _process_pages_worker(payloads)
+        else:
+            max_workers = max_workers or os.cpu_count() or 1
+            # Send pages in batches (at most 64 pages) so each task amortises its
+            # call and pickling overhead while every worker still gets work
+            batch_size = min(64, -(-len(payloads) // max_workers))
+            batches = [payloads[i:i + batch_size] for i in range(0, len(payloads), batch_size)]
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = [result for batch in executor.map(_process_pages_worker, batches) for result in batch]
+        self._chunk_cache.update(zip(misses, results))
         
-        # Process each page
         processed_chunks = []
+        seen: Dict[bytes, int] = {}
+        for page, key in zip(kept, keys):
+            processed_chunks.extend(self._page_documents(page.metadata, self._chunk_cache[key], seen))
         
-        for page_num, page in enumerate(pages):
-            # Clean text
-            cleaned_text = self._clean_text(page.page_content)
-            
-            # Skip nearly empty pages
-            if len(cleaned_text.strip()) < 50:
-                continue
+        return processed_chunks
+    
+    def iter_pdf(self, pdf_path: str) -> Iterator[Document]:
+        """
+        Stream processed chunks page by page.
+        
+        Reads pages straight from PyMuPDF instead of loading the whole
+        document first, so only one page's text is held at a time. Pages
+        with too little raw text (e.g. scanned images) are skipped before
+        any cleaning.
+        
+        Args:
+            pdf_path: Path to the PDF file
             
-            # Create chunks with enhanced metadata
-            chunks = self.text_splitter.create_documents(
-                texts=[cleaned_text],
-                metadatas=[{
-                    **page.metadata,
-                    "page": page_num + 1,
-                    "total_pages": len(pages),
-                    "chunk_method": "smart_pdf_processor",
-                    "char_count": len(cleaned_text)
-                }]
-            )
+        Yields:
+            Processed Document chunks with enhanced metadata, or a single empty
+            placeholder Document if the PDF looks image-only
+        """
+        with _open_pdf(pdf_path) as doc:
+            skipped = self._skip_image_only(doc, pdf_path)
+            if skipped:
+                yield from skipped
+                return
             
-            processed_chunks.extend(chunks)
+            base_metadata = self._document_metadata(doc, pdf_path)
+            seen: Dict[bytes, int] = {}
+            for page_num, page in enumerate(doc):
+                text = page.get_text("text")
+                
+                # Cleaning never grows text, so short raw pages would be skipped anyway
+                if len(text.strip()) < MIN_PAGE_CHARS:
+                    continue
+                
+                key = self._cache_key(text)
+                if key not in self._chunk_cache:
+                    self._chunk_cache[key] = _process_page_worker((text, self.chunk_size, self.chunk_overlap))
+                
+                yield from self._page_documents(
+                    {**base_metadata, "page": page_num}, self._chunk_cache[key], seen
+                )
+    
+    def _document_metadata(self, doc: "fitz.Document", pdf_path: str) -> Dict[str, Any]:
+        """Document-level metadata shared by every page (same fields as PyMuPDFLoader)."""
+        return {
+            "source": pdf_path,
+            "file_path": pdf_path,
+            "total_pages": doc.page_count,
+            **doc.metadata
+        }
+    
+    def _skip_image_only(self, doc: "fitz.Document", pdf_path: str) -> List[Document]:
+        """
+        Detect scanned (image-only) PDFs from their first page.
         
-        return processed_chunks
+        Text extraction on such PDFs only yields empty strings, so they are
+        marked for offline OCR instead of being processed page by page.
+        
+        Returns:
+            A single placeholder Document with a skipped_reason, or an empty
+            list if the PDF should be processed normally
+        """
+        if doc.page_count == 0:
+            return []
+        first_page = doc[0]
+        if len(first_page.get_text("text").strip()) < self.image_only_threshold and first_page.get_images():
+            return [Document(page_content="", metadata={"source": pdf_path, "skipped_reason": "image_only"})]
+        return []
+    
+    def _page_documents(self, page_metadata: Dict[str, Any], cached: Tuple[int, List[str], bytes],
+                        seen: Dict[bytes, int]) -> List[Document]:
+        """
+        Chunks for one page, or a reference to an earlier identical page.
+        
+        Repeated pages (boilerplate, mastheads, form pages) whose cleaned text
+        matches an earlier page in the same PDF are not chunked again. They get
+        a single empty Document whose "duplicate_of_page" metadata holds the
+        "page" value of the first occurrence, whose chunks a consumer can reuse.
+        
+        Args:
+            page_metadata: Metadata of the page, including "page" and "total_pages"
+            cached: (char_count, chunk_texts, digest) for the page
+            seen: Digest to first page mapping, shared across one PDF
+            
+        Returns:
+            List of Documents for the page
+        """
+        char_count, chunk_texts, digest = cached
+        if chunk_texts:
+            if digest in seen:
+                return [Document(page_content="", metadata={**page_metadata, "duplicate_of_page": seen[digest]})]
+            seen[digest] = page_metadata["page"]
+        return self._build_chunks(page_metadata, char_count, chunk_texts)
+    
+    def _build_chunks(self, page_metadata: Dict[str, Any], char_count: int,
+                      chunk_texts: List[str]) -> List[Document]:
+        """Wrap a page's chunk texts in Documents carrying the enhanced page metadata."""
+        # Processor fields win over page metadata. Resolved once per page;
+        # each chunk only adds its own index on top.
+        base_metadata = dict(ChainMap(
+            {"chunk_method": "smart_pdf_processor", "char_count": char_count},
+            page_metadata
+        ))
+        return [
+            Document(page_content=text, metadata={**base_metadata, "chunk_index": chunk_index})
+            for chunk_index, text in enumerate(chunk_texts)
+        ]
+    
+    def _cache_key(self, text: str) -> str:
+        """Hash page text together with the chunk settings that shape its chunks."""
+        prefix = f"{self.chunk_size}:{self.chunk_overlap}:".encode()
+        return hashlib.blake2b(prefix + text.encode("utf-8"), digest_size=16).hexdigest()
     
     def _clean_text(self, text: str) -> str:
         """
@@ -88,20 +331,19 @@ class SmartPDFProcessor:
         Returns:
             Cleaned text with fixed formatting issues
         """
-        # Remove excessive whitespace
-        text = " ".join(text.split())
-        
-        # Fix common PDF ligature issues
-        text = text.replace("ï¬", "fi")
-        text = text.replace("ï¬‚", "fl")
-        
-        return text
+        # Remove excessive whitespace, then fix common PDF ligature issues
+        text = _WHITESPACE_RE.sub(" ", text).strip()
+        return _LIGATURE_RE.sub(_replace_ligature, text)
 
 
 def compare_pdf_loaders(pdf_path: str) -> Dict[str, Any]:
     """
     Compare different PDF loading methods.
     
+    The file is memory-mapped once and both libraries read the same
+    mapping without copying it, so only the first parse pays for disk IO
+    and a large PDF is never held in memory as a whole.
+    
     Args:
         pdf_path: Path to the PDF file
         
@@ -109,46 +351,89 @@ def compare_pdf_loaders(pdf_path: str) -> Dict[str, Any]:
         Dictionary containing comparison results
     """
     results = {}
+    lines: List[str] = []
     
-    # PyPDFLoader
-    print("Testing PyPDFLoader...")
-    try:
-        pypdf_loader = PyPDFLoader(pdf_path)
-        pypdf_docs = pypdf_loader.load()
-        results['pypdf'] = {
-            'success': True,
-            'pages': len(pypdf_docs),
-            'first_page_length': len(pypdf_docs[0].page_content) if pypdf_docs else 0,
-            'metadata_keys': list(pypdf_docs[0].metadata.keys()) if pypdf_docs else []
-        }
-        print(f"  ✅ Loaded {len(pypdf_docs)} pages")
-        print(f"  📄 First page content (100 chars): {pypdf_docs[0].page_content[:100]}...")
-    except Exception as e:
-        results['pypdf'] = {'success': False, 'error': str(e)}
-        print(f"  ❌ Error: {e}")
-    print(results['pypdf'])
-    # PyMuPDFLoader
-    print("\nTesting PyMuPDFLoader...")
     try:
-        pymupdf_loader = PyMuPDFLoader(pdf_path)
-        pymupdf_docs = pymupdf_loader.load()
-        results['pymupdf'] = {
-            'success': True,
-            'pages': len(pymupdf_docs),
-            'first_page_length': len(pymupdf_docs[0].page_content) if pymupdf_docs else 0,
-            'metadata_keys': list(pymupdf_docs[0].metadata.keys()) if pymupdf_docs else []
-        }
-        print(f"  ✅ Loaded {len(pymupdf_docs)} pages")
-        print(f"  📄 First page content (100 chars): {pymupdf_docs[0].page_content[:100]}...")
-    except Exception as e:
-        results['pymupdf'] = {'success': False, 'error': str(e)}
-        print(f"  ❌ Error: {e}")
-    print(results['pymupdf'])
+        with open(pdf_path, "rb") as f:
+            # The mapping stays valid after the file is closed
+            pdf_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:  # ValueError: an empty file cannot be mapped
+        for loader in ('pypdf', 'pymupdf'):
+            results[loader] = {'success': False, 'error': str(e)}
+        lines.append(f"❌ Error reading {pdf_path}: {e}")
+        print("\n".join(lines))
+        return results
+    
+    with pdf_map:
+        # pypdf (pure Python)
+        lines.append("Testing pypdf...")
+        try:
+            import pypdf
+        
+            start = time.perf_counter()
+            reader = pypdf.PdfReader(pdf_map)
+            pypdf_pages = [page.extract_text() for page in reader.pages]
+            results['pypdf'] = {
+                'success': True,
+                'pages': len(pypdf_pages),
+                'first_page_length': len(pypdf_pages[0]) if pypdf_pages else 0,
+                'metadata_keys': list(reader.metadata or {}),
+                'seconds': time.perf_counter() - start
+            }
+            lines.append(f"  ✅ Loaded {len(pypdf_pages)} pages")
+            lines.append(f"  📄 First page content (100 chars): {pypdf_pages[0][:100]}...")
+        except Exception as e:
+            results['pypdf'] = {'success': False, 'error': str(e)}
+            lines.append(f"  ❌ Error: {e}")
+        lines.append(str(results['pypdf']))
+        # PyMuPDF (native MuPDF)
+        lines.append("\nTesting PyMuPDF...")
+        try:
+            start = time.perf_counter()
+            # PyMuPDF reads a memoryview in place; it must be released before unmapping
+            view = memoryview(pdf_map)
+            try:
+                with fitz.open(stream=view, filetype="pdf") as doc:
+                    pymupdf_pages = [page.get_text() for page in doc]
+                    metadata_keys = list(doc.metadata or {})
+            finally:
+                view.release()
+            results['pymupdf'] = {
+                'success': True,
+                'pages': len(pymupdf_pages),
+                'first_page_length': len(pymupdf_pages[0]) if pymupdf_pages else 0,
+                'metadata_keys': metadata_keys,
+                'seconds': time.perf_counter() - start
+            }
+            lines.append(f"  ✅ Loaded {len(pymupdf_pages)} pages")
+            lines.append(f"  📄 First page content (100 chars): {pymupdf_pages[0][:100]}...")
+        except Exception as e:
+            results['pymupdf'] = {'success': False, 'error': str(e)}
+            lines.append(f"  ❌ Error: {e}")
+        lines.append(str(results['pymupdf']))
 
-   
+    # Emit the whole phase in one write
+    print("\n".join(lines))
     return results
 
 
+def to_json_bytes(chunk: Document) -> bytes:
+    """
+    Serialize a chunk's metadata to JSON, e.g. for vector-store writes.
+    
+    Uses orjson when it is installed and the standard json module otherwise.
+    
+    Args:
+        chunk: Document whose metadata should be serialized
+        
+    Returns:
+        UTF-8 encoded JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(chunk.metadata, default=str)
+    return json.dumps(chunk.metadata, default=str, ensure_ascii=False).encode("utf-8")
+
+
 def clean_text(text: str) -> str:
     """
     Standalone function to clean PDF text.
@@ -159,14 +444,9 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Remove excessive whitespace
-    text = " ".join(text.split())
-    
-    # Fix ligatures
-    text = text.replace("ï¬", "fi")
-    text = text.replace("ï¬‚", "fl")
-    
-    return text
+    # Remove excessive whitespace, then fix ligatures
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    return _LIGATURE_RE.sub(_replace_ligature, text)
 
 
 def main():
@@ -175,13 +455,13 @@ def main():
     """
     pdf_path = "data/pdf/th.pdf"
     
-    print("=" * 70)
+    print(_SEP)
     print("PDF Document Parsing and Processing Demo")
-    print("=" * 70)
+    print(_SEP)
     
     # Compare loaders
     print("\n1. Comparing PDF Loaders:")
-    print("-" * 70)
+    print(_DASH)
     comparison = compare_pdf_loaders(pdf_path)
     print("\nComparison Results:")
     for loader, result in comparison.items():
@@ -189,7 +469,7 @@ def main():
     
     # Process with SmartPDFProcessor
     print("\n2. Processing with SmartPDFProcessor:")
-    print("-" * 70)
+    print(_DASH)
     try:
         processor = SmartPDFProcessor(chunk_size=1000, chunk_overlap=100)
         smart_chunks = processor.process_pdf(pdf_path)
@@ -209,7 +489,7 @@ def main():
     
     # Text cleaning demo
     print("\n3. Text Cleaning Demo:")
-    print("-" * 70)
+    print(_DASH)
     raw_text = """Company Financial Report
 
 
@@ -233,29 +513,29 @@ Page 1 of 10
     print("\nAFTER:")
     print(repr(cleaned[:100]))
     
-    print("\n" + "=" * 70)
-    print("PDF Loader Comparison Summary:")
-    print("=" * 70)
-    print("\nPyPDFLoader:")
-    print("  ✅ Simple and reliable")
-    print("  ✅ Good for most PDFs")
-    print("  ✅ Preserves page numbers")
-    print("  ⚠️  Basic text extraction")
-    print("  Use when: Standard text PDFs")
-    
-    print("\nPyMuPDFLoader:")
-    print("  ✅ Fast processing")
-    print("  ✅ Good text extraction")
-    print("  ✅ Image extraction support")
-    print("  ✅ More detailed metadata")
-    print("  Use when: Speed is important")
-    
-    print("\nSmartPDFProcessor:")
-    print("  ✅ Enhanced text cleaning")
-    print("  ✅ Smart chunking with overlap")
-    print("  ✅ Enhanced metadata")
-    print("  ✅ Error handling")
-    print("  Use when: Production RAG systems")
+    print("\n".join([
+        f"\n{_SEP}",
+        "PDF Loader Comparison Summary:",
+        _SEP,
+        "\nPyPDFLoader:",
+        "  ✅ Simple and reliable",
+        "  ✅ Good for most PDFs",
+        "  ✅ Preserves page numbers",
+        "  ⚠️  Basic text extraction",
+        "  Use when: Standard text PDFs",
+        "\nPyMuPDFLoader:",
+        "  ✅ Fast processing",
+        "  ✅ Good text extraction",
+        "  ✅ Image extraction support",
+        "  ✅ More detailed metadata",
+        "  Use when: Speed is important",
+        "\nSmartPDFProcessor:",
+        "  ✅ Enhanced text cleaning",
+        "  ✅ Smart chunking with overlap",
+        "  ✅ Enhanced metadata",
+        "  ✅ Error handling",
+        "  Use when: Production RAG systems",
+    ]))
 
 
 if __name__ == "__main__":
@@ -2,36 +2,66 @@
 Word Document Processing
 """
 
-from langchain_community.document_loaders import Docx2txtLoader, UnstructuredWordDocumentLoader
+from docx import Document as Docx
+from docx.table import Table
+from langchain_core.documents import Document
 
-# Method 1: Using Docx2txtLoader
-print("1️⃣ Using Docx2txtLoader")
+
+def iter_docx_sections(path):
+    """Yield one Document per heading-delimited section, reading paragraphs and tables in order"""
+    section, buf = 0, []
+    for block in Docx(path).iter_inner_content():
+        if isinstance(block, Table):
+            # One line per row, cells tab-separated, in the section the table sits in
+            buf.extend("\t".join(cell.text for cell in row.cells) for row in block.rows)
+            continue
+        if (block.style.name or "").startswith("Heading") and buf:
+            yield Document(page_content="\n".join(buf), metadata={"source": path, "section": section})
+            section, buf = section + 1, []
+        buf.append(block.text)
+    if buf:
+        yield Document(page_content="\n".join(buf), metadata={"source": path, "section": section})
+
+
+# Method 1: Using python-docx, one Document per section
+print("1️⃣ Using python-docx sections")
 try:
-    docx_loader = Docx2txtLoader("data/word_files/proposal.docx")
-    docs = docx_loader.load()
-    print(f"✅ Loaded {len(docs)} document(s)")
+    docs = list(iter_docx_sections("data/word_files/proposal.docx"))
+    print(f"✅ Loaded {len(docs)} section(s)")
     print(f"Content preview: {docs[0].page_content[:200]}...")
     print(f"Metadata: {docs[0].metadata}")
 except Exception as e:
     print(f"Error: {e}")
 
 # Method 2: Using UnstructuredWordDocumentLoader
+# Element mode runs unstructured's full partitioning to tag each element with a
+# category (Title, NarrativeText, ...). Set to True only when that structure is needed.
+NEED_STRUCTURE = False
+
 print("\n2️⃣ Using UnstructuredWordDocumentLoader")
 try:
+    # Imported here so the unstructured dependency tree is only loaded when used
+    from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+
     unstructured_loader = UnstructuredWordDocumentLoader(
         "data/word_files/proposal.docx", 
-        mode="elements"
+        mode="elements" if NEED_STRUCTURE else "single"
     )
     unstructured_docs = unstructured_loader.load()
     
-    print(f"✅ Loaded {len(unstructured_docs)} elements")
-    for i, doc in enumerate(unstructured_docs[:10]):
-        print(f"\nElement {i+1}:")
-        print(f"Type: {doc.metadata.get('category', 'unknown')}")
-        print(f"Content: {doc.page_content[:100]}...")
-    print("METADATA of 4th element:")
-    print(f"Metadata: {unstructured_docs[3].metadata}")  # Display metadata of the 4th element
-    print(f"\n Data: {unstructured_docs[8].page_content}")  # Display metadata of the 4th element
+    if NEED_STRUCTURE:
+        print(f"✅ Loaded {len(unstructured_docs)} elements")
+        for i, doc in enumerate(unstructured_docs[:10]):
+            print(f"\nElement {i+1}:")
+            print(f"Type: {doc.metadata.get('category', 'unknown')}")
+            print(f"Content: {doc.page_content[:100]}...")
+        print("METADATA of 4th element:")
+        print(f"Metadata: {unstructured_docs[3].metadata}")  # Display metadata of the 4th element
+        print(f"\n Data: {unstructured_docs[8].page_content}")  # Display metadata of the 4th element
+    else:
+        print(f"✅ Loaded {len(unstructured_docs)} document(s)")
+        print(f"Content preview: {unstructured_docs[0].page_content[:200]}...")
+        print(f"Metadata: {unstructured_docs[0].metadata}")
 
 except Exception as e:
     print(e)
@@ -4,9 +4,16 @@ CSV And Excel files - Structured Data Processing
 
 import pandas as pd
 import os
+from openpyxl import Workbook
 from typing import List
 from langchain_core.documents import Document
-from langchain_community.document_loaders import CSVLoader, UnstructuredExcelLoader
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; fall back to pandas writers
+    pa = None
 
 
 # ============================================================================
@@ -31,21 +38,74 @@ data = {
     ]
 }
 
-# Save as CSV
+# Save as CSV (and Parquet, when pyarrow is available)
 df = pd.DataFrame(data)
-df.to_csv('data/structured_files/products.csv', index=False)
-print("✅ Created products.csv")
+if pa is not None:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pacsv.write_csv(table, 'data/structured_files/products.csv')
+    pq.write_table(table, 'data/structured_files/products.parquet', compression='zstd')
+    print("✅ Created products.csv and products.parquet")
+else:
+    df.to_csv('data/structured_files/products.csv', index=False)
+    print("✅ Created products.csv")
 
 # Save as Excel with multiple sheets
-with pd.ExcelWriter('data/structured_files/inventory.xlsx') as writer:
-    df.to_excel(writer, sheet_name='Products', index=False)
-    
-    # Add another sheet
-    summary_data = {
-        'Category': ['Electronics', 'Accessories'],
-        'Total_Items': [3, 2],
-        'Total_Value': [1389.97, 109.98]
-    }
-    pd.DataFrame(summary_data).to_excel(writer, sheet_name='Summary', index=False)
+# A write-only workbook streams each row to disk instead of holding every cell in memory
+workbook = Workbook(write_only=True)
+
+products_sheet = workbook.create_sheet('Products')
+products_sheet.append(list(df.columns))
+for row in df.itertuples(index=False, name=None):
+    products_sheet.append(row)
+
+# Add another sheet
+summary_data = {
+    'Category': ['Electronics', 'Accessories'],
+    'Total_Items': [3, 2],
+    'Total_Value': [1389.97, 109.98]
+}
+summary_sheet = workbook.create_sheet('Summary')
+summary_sheet.append(list(summary_data))
+for row in zip(*summary_data.values()):
+    summary_sheet.append(row)
+
+workbook.save('data/structured_files/inventory.xlsx')
 
 print("✅ Created inventory.xlsx with multiple sheets\n")
+
+
+# ============================================================================
+# PART 2: LOAD CSV ROWS AS DOCUMENTS
+# ============================================================================
+
+def load_csv_documents(path: str) -> List[Document]:
+    """One Document per CSV row, formatted like CSVLoader ("column: value" lines)"""
+    if pa is None:
+        from langchain_community.document_loaders import CSVLoader
+        return CSVLoader(path, encoding="utf-8").load()
+
+    # Read the header first so every column can be parsed as text, like csv.DictReader
+    with pacsv.open_csv(path) as reader:
+        names = reader.schema.names
+    table = pacsv.read_csv(
+        path,
+        convert_options=pacsv.ConvertOptions(column_types={name: pa.string() for name in names})
+    )
+    # Columnar C++ parse, then a single precompiled format call per row
+    fmt = "\n".join(
+        f"{name.strip().replace('{', '{{').replace('}', '}}')}: {{}}" for name in names
+    ).format
+    rows = zip(*(column.to_pylist() for column in table.columns))
+    return [
+        Document(
+            page_content=fmt(*("" if value is None else value.strip() for value in row)),
+            metadata={"source": path, "row": i}
+        )
+        for i, row in enumerate(rows)
+    ]
+
+
+csv_docs = load_csv_documents('data/structured_files/products.csv')
+print(f"✅ Loaded {len(csv_docs)} rows from products.csv")
+print(f"First row:\n{csv_docs[0].page_content}")
+print(f"Metadata: {csv_docs[0].metadata}")